@@ -1,16 +1,75 @@
 import os
-from google import genai
-import json
+import asyncio
 import logging
+import orjson
+from typing import Optional
+import httpx
 from fastapi import HTTPException
-# Configure the Gemini client
-try:
-    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-except Exception as e:
-    logging.error(f"Error configuring Gemini: {e}", exc_info=True)
-    client = None
 
-def generate_json_response(prompt: str):
+GEMINI_MODEL = "gemini-2.5-flash-lite"
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+
+
+def _response_text(data: dict) -> str:
+    """
+    Extracts the generated text from a Gemini generateContent response body.
+    """
+    candidates = data.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
+
+class GeminiClient:
+    """
+    Async client for the Gemini REST API. All calls go through the shared
+    httpx.AsyncClient, so connections (and their TLS sessions) are reused
+    across requests instead of being set up per call.
+    """
+
+    def __init__(self, http: httpx.AsyncClient, api_key: str, model: str = GEMINI_MODEL):
+        self.http = http
+        self.model_url = f"{GEMINI_API_URL}/{model}"
+        self.headers = {"x-goog-api-key": api_key}
+
+    async def generate(self, prompt: str, json_mode: bool = False) -> str:
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        if json_mode:
+            body["generationConfig"] = {"responseMimeType": "application/json"}
+
+        response = await self.http.post(f"{self.model_url}:generateContent", json=body, headers=self.headers)
+        response.raise_for_status()
+        return _response_text(orjson.loads(response.content))
+
+    async def stream(self, prompt: str):
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        async with self.http.stream(
+            "POST", f"{self.model_url}:streamGenerateContent",
+            params={"alt": "sse"}, json=body, headers=self.headers
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    text = _response_text(orjson.loads(line[len("data:"):]))
+                    if text:
+                        yield text
+
+
+# Set up by configure() from the app's lifespan
+client: Optional[GeminiClient] = None
+
+def configure(http: httpx.AsyncClient):
+    """
+    Creates the Gemini client on top of the app's shared HTTP client.
+    """
+    global client
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        logging.error("Error configuring Gemini: GEMINI_API_KEY is not set")
+        client = None
+        return
+    client = GeminiClient(http, api_key)
+
+async def generate_json_response(prompt: str):
     """
     Calls the Gemini model with a specific prompt to get a JSON response.
     Uses Gemini's JSON mode for reliable output.
@@ -20,19 +79,14 @@ def generate_json_response(prompt: str):
 
     try:
         # Using JSON mode
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-lite",
-            contents=prompt,
-            config={"response_mime_type": "application/json"}
-        )
+        text_output = await client.generate(prompt, json_mode=True)
         # The API returns a string, so we need to parse it into a Python dict
-        text_output = response.candidates[0].content.parts[0].text
-        return json.loads(text_output)
+        return orjson.loads(text_output)
     except Exception as e:
         logging.error(f"Error generating JSON from AI: {e}", exc_info=True)
         raise HTTPException(status_code=503, detail="AI service failed to generate a valid JSON response.")
 
-def generate_text_response(prompt: str):
+async def generate_text_response(prompt: str):
     """
     Calls the Gemini model with a prompt to get a simple text response.
     """
@@ -40,11 +94,147 @@ def generate_text_response(prompt: str):
         raise HTTPException(status_code=500, detail="AI model is not configured.")
 
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-lite", 
-            contents=prompt
-        )
-        return response.text
+        return await client.generate(prompt)
     except Exception as e:
         logging.error(f"Error generating text from AI: {e}", exc_info=True)
         raise HTTPException(status_code=503, detail="AI service failed to generate a text response.")
+
+async def stream_text_response(prompt: str):
+    """
+    Calls the Gemini model with a prompt and yields the text response
+    chunk by chunk as it is generated.
+    """
+    if not client:
+        raise HTTPException(status_code=500, detail="AI model is not configured.")
+
+    try:
+        async for chunk in client.stream(prompt):
+            yield chunk
+    except Exception as e:
+        logging.error(f"Error streaming text from AI: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail="AI service failed to generate a text response.")
+
+
+def hint_prompt(text: str, choices: list) -> str:
+    """
+    Builds the prompt asking for a hint on a single question.
+    """
+    return (
+        f"You are a helpful quiz assistant. Provide a short, one-sentence hint for the following multiple-choice question. "
+        f"The hint must guide the user toward the correct thinking process without revealing the answer. "
+        f"Question: \"{text}\" Options: {choices}"
+    )
+
+
+class HintBatcher:
+    """
+    Groups hint requests that arrive within a short window into a single
+    Gemini call and resolves each waiting caller with its own hint.
+    """
+
+    def __init__(self, window: float = 0.05, max_batch: int = 10):
+        self.window = window
+        self.max_batch = max_batch
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._flushes = set()
+
+    async def request(self, question_id: int, text: str, choices: list) -> str:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((question_id, text, choices, future))
+        return await future
+
+    async def stop(self):
+        """
+        Cancels the worker and any batches still waiting on Gemini.
+        A later request() starts a new worker.
+        """
+        tasks = [task for task in [self._worker, *self._flushes] if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = self._queue = self._worker = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Flush in the background so the next window starts collecting
+            # while this batch is still waiting on Gemini.
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        listed = "\n".join(
+            f'[{question_id}] Question: "{text}" Options: {choices}'
+            for question_id, text, choices, _ in batch
+        )
+        prompt = (
+            "You are a helpful quiz assistant. Provide a short, one-sentence hint for each of the following multiple-choice questions. "
+            "Each hint must guide the user toward the correct thinking process without revealing the answer. "
+            'Provide your response as a single valid JSON object with a single key "hints", which is a list of objects '
+            'with exactly these keys: "id" (the integer in square brackets before the question) and "hint" (string).\n'
+            f"{listed}"
+        )
+
+        try:
+            ai_response = await generate_json_response(prompt)
+        except Exception as e:
+            if len(batch) == 1:
+                _, _, _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # One unusable reply shouldn't fail every question in the batch
+            ai_response = {}
+
+        hints = {}
+        items = ai_response.get("hints") if isinstance(ai_response, dict) else None
+        for item in items if isinstance(items, list) else []:
+            # JSON mode doesn't enforce a schema, so ids may come back as strings
+            try:
+                hint = str(item["hint"]).strip()
+                if hint:
+                    hints[int(item["id"])] = hint
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        missing = []
+        for question_id, text, choices, future in batch:
+            if future.done():
+                continue
+            if question_id in hints:
+                future.set_result(hints[question_id])
+            else:
+                missing.append((text, choices, future))
+
+        # Ask again one question at a time for anything the batch reply left out
+        await asyncio.gather(*[self._single(text, choices, future) for text, choices, future in missing])
+
+    async def _single(self, text: str, choices: list, future: asyncio.Future):
+        try:
+            hint = (await generate_text_response(hint_prompt(text, choices))).strip()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if future.done():
+            return
+        if hint:
+            future.set_result(hint)
+        else:
+            future.set_exception(HTTPException(status_code=503, detail="AI service failed to generate a hint."))
+
+
+hint_batcher = HintBatcher()
@@ -0,0 +1,39 @@
+import hashlib
+import threading
+import time
+from cachetools import TLRUCache
+
+CACHE_TTL = 60
+
+def _expires(key, value, now):
+    # Never keep an entry past the token's own exp claim
+    _, _, exp = value
+    return min(now + CACHE_TTL, exp)
+
+# Short-lived cache of verified tokens so repeated requests with the same
+# bearer token skip the JWT decode and the user lookup.
+# Keys are SHA-256 digests, the raw token is never stored.
+_cache = TLRUCache(maxsize=10_000, ttu=_expires, timer=time.time)
+_lock = threading.Lock()
+
+def _key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def get_user(token: str):
+    """
+    Returns the cached (user_id, username) for a token, or None on a miss.
+    """
+    with _lock:
+        entry = _cache.get(_key(token))
+    if entry is None:
+        return None
+    user_id, username, _ = entry
+    return user_id, username
+
+def store_user(token: str, user_id: int, username: str, exp: float):
+    with _lock:
+        _cache[_key(token)] = (user_id, username, exp)
+
+def evict(token: str):
+    with _lock:
+        _cache.pop(_key(token), None)
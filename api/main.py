@@ -11,58 +11,142 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 import django
 django.setup()
 
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, BackgroundTasks, Depends, Header, HTTPException, Query, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import HTMLResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 import jwt
 import json
+import asyncio
 import datetime
-import re
-from django.utils import timezone
+import functools
+import hashlib
+import time
+import logging
+import httpx
+from contextlib import asynccontextmanager
+from asgiref.sync import sync_to_async
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth.models import User
-from django.db.models import Q, Max
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q, Max, Count, Prefetch
+from django.utils import timezone
 from typing import List, Optional
-from . import ai_service
-from quiz.models import UserProfile, Quiz, Question, Submission
+from . import ai_service, auth_cache
+from quiz import leaderboard
+from quiz.signals import hint_cache_key
+from quiz.models import UserProfile, SubjectPerformance, Quiz, Question, Submission
 
 # secret + algorithm from env (or fallback to Django SECRET_KEY)
 SECRET_KEY = os.getenv('SECRET_KEY') or 'dev-secret-change-me'
 ALGORITHM = 'HS256'
 ACCESS_EXP_HOURS = 8
-
-app = FastAPI(title="AI Quizzer - API")
+ACCESS_EXP_SECONDS = ACCESS_EXP_HOURS * 3600
+# Prepared once so every authenticated request reuses them in jwt.decode
+DECODE_KEY = SECRET_KEY.encode()
+DECODE_ALGORITHMS = (ALGORITHM,)
+DECODE_OPTIONS = {"require": ["sub", "exp"]}
+# The only User columns the API reads
+USER_FIELDS = ('id', 'username')
+LEADERBOARD_REFRESH_SECONDS = 60
+
+def refresh_leaderboard():
+    # Runs in its own worker thread, so recycle that thread's connection here
+    close_old_connections()
+    try:
+        leaderboard.refresh()
+    finally:
+        close_old_connections()
+
+async def refresh_leaderboard_periodically():
+    while True:
+        try:
+            # Not thread_sensitive: the refresh scans every submission, and the shared
+            # executor thread would make this worker's async ORM calls wait behind it
+            await sync_to_async(refresh_leaderboard, thread_sensitive=False)()
+        except Exception as e:
+            logging.error(f"Error refreshing leaderboard: {e}", exc_info=True)
+        await asyncio.sleep(LEADERBOARD_REFRESH_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP/2 client for all outgoing AI calls
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    )
+    ai_service.configure(app.state.http)
+
+    refresher = None
+    if leaderboard.is_available():
+        refresher = asyncio.create_task(refresh_leaderboard_periodically())
+    yield
+    if refresher:
+        refresher.cancel()
+    await ai_service.hint_batcher.stop()
+    await app.state.http.aclose()
+
+app = FastAPI(title="AI Quizzer - API", lifespan=lifespan)
 security = HTTPBearer()
 
+# Django only applies CONN_MAX_AGE / CONN_HEALTH_CHECKS in close_old_connections(),
+# which it calls on its own request signals and FastAPI never does. Connections
+# are per thread, so the check has to run in whichever thread does the ORM work:
+# the AnyIO worker for sync code, asgiref's executor thread for the async ORM.
+def recycles_db_connections(endpoint):
+    """
+    Runs close_old_connections() before and after a sync endpoint, in its worker thread.
+    """
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+async def recycle_async_db_connections():
+    """
+    Runs close_old_connections() in the thread the async ORM calls use.
+    Call it before the first query of an async endpoint.
+    """
+    await sync_to_async(close_old_connections)()
+
 # ==== Pydantic Models ====
 # -- Input Models --
-class LoginIn(BaseModel):
-    username: str
+class InputModel(BaseModel):
+    # Request bodies are read-only once parsed; unknown keys are dropped
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+class LoginIn(InputModel):
+    username: str = Field(min_length=1)
     password: str
 
-class GenerateQuizIn(BaseModel):
+class GenerateQuizIn(InputModel):
     grade: int
     subject: str
-    total_questions: int = Field(1, gt=0)
+    total_questions: int = Field(1, gt=0, le=50)
     max_score: int = Field(1, gt=0)
 
-class QuizResponseItem(BaseModel):
+class QuizResponseItem(InputModel):
     questionId: int
     userResponse: str
 
-class QuizSubmitRequest(BaseModel):
+class QuizSubmitRequest(InputModel):
     quizId: int
     responses: List[QuizResponseItem]
 
-class HintRequest(BaseModel):
-    questionId: int
-
-class QuizResponseItem(BaseModel):
+class HintRequest(InputModel):
     questionId: int
-    userResponse: str
 
 # -- Output Models --
 class QuestionOut(BaseModel):
+    # Built straight from Question instances with model_validate
+    model_config = ConfigDict(from_attributes=True)
     id: int
     text: str
     options: dict
@@ -95,6 +179,7 @@ class SubmissionReviewOut(BaseModel):
     score: int
     max_score: int
     submitted_at: datetime.datetime
+    suggestions: Optional[List[str]]
     questions: List[QuestionReview]
 
 class LeaderboardEntry(BaseModel):
@@ -102,9 +187,8 @@ class LeaderboardEntry(BaseModel):
     username: str
     top_score: int
 
-@app.get("/", response_class=HTMLResponse, include_in_schema=False)
-def root():
-    html_content = """
+# The landing page never changes, so encode it and compute its ETag once at import
+ROOT_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -253,8 +337,17 @@ def root():
         </div>
     </body>
     </html>
-    """
-    return HTMLResponse(content=html_content)
+    """.encode()
+ROOT_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": f'"{hashlib.md5(ROOT_HTML).hexdigest()}"',
+}
+
+@app.get("/", response_class=HTMLResponse, include_in_schema=False)
+async def root(if_none_match: Optional[str] = Header(None)):
+    if if_none_match == ROOT_HEADERS["ETag"]:
+        return Response(status_code=304, headers=ROOT_HEADERS)
+    return Response(content=ROOT_HTML, media_type="text/html", headers=ROOT_HEADERS)
 
 
 # === Authentication & User Handling ===
@@ -263,19 +356,31 @@ def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)) ->
     Decodes JWT token and returns the corresponding Django User object if valid.
     """
     token = creds.credentials
+    cached = auth_cache.get_user(token)
+    if cached:
+        user_id, username = cached
+        return User(pk=user_id, username=username)
+
+    close_old_connections()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
+        # A missing "sub" or "exp" claim raises MissingRequiredClaimError (a PyJWTError)
+        payload = jwt.decode(token, DECODE_KEY, algorithms=DECODE_ALGORITHMS, options=DECODE_OPTIONS)
+        username = payload["sub"]
+        # "require" only rejects a missing claim, not an empty one
         if not username:
             raise HTTPException(status_code=401, detail="Invalid token payload")
         
-        # Get or create the user in the database
-        user, created = User.objects.get_or_create(username=username)
-        if created:
-            UserProfile.objects.create(user=user) # Create their profile too
+        # Existing users are a single indexed SELECT of just the fields handlers use
+        user = User.objects.only(*USER_FIELDS).filter(username=username).first()
+        if user is None:
+            # get_or_create so two first requests racing each other don't fail
+            user, _ = User.objects.get_or_create(username=username)
+            UserProfile.objects.get_or_create(user=user) # Create their profile too
+        auth_cache.store_user(token, user.id, user.username, payload["exp"])
         return user
 
     except jwt.ExpiredSignatureError:
+        auth_cache.evict(token)
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -285,12 +390,11 @@ def login(payload: LoginIn):
     """
     Mock authentication: accept ANY username/password and return a signed JWT.
     """
-    now = timezone.now()
-    exp = now + datetime.timedelta(hours=ACCESS_EXP_HOURS)
+    now = int(time.time())
     claims = {
         "sub": payload.username, 
         "iat": now, 
-        "exp": exp
+        "exp": now + ACCESS_EXP_SECONDS
     }
     token = jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
     return {"access_token": token, "token_type": "bearer"}
@@ -301,50 +405,131 @@ def protected_example(username: str = Depends(get_current_user)):
 
 
 # === API Endpoints ===
-hint_cache = {}
+HINT_CACHE_TTL = 3600
+# With Redis, edits to a question evict its shared hint (see quiz/signals.py), so the
+# shared copy can live longer. The per-process fallback cache can't see edits made
+# in other processes, so it keeps the short TTL.
+HINT_SHARED_CACHE_TTL = 86400 if settings.REDIS_URL else HINT_CACHE_TTL
+QUESTIONS_PER_PROMPT = 5
+# Most prompts for one quiz that may be waiting on Gemini at the same time
+MAX_PARALLEL_PROMPTS = 4
+QUESTION_BATCH_SIZE = 500
+
+# Hints are cached per process first, then in the shared Django cache
+# (Redis when REDIS_URL is set) so every worker can reuse them.
+hint_cache = TTLCache(maxsize=10_000, ttl=HINT_CACHE_TTL)
+
+async def get_cached_hint(question_id: int) -> Optional[str]:
+    hint = hint_cache.get(question_id)
+    if hint is None:
+        hint = await cache.aget(hint_cache_key(question_id))
+        if hint is not None:
+            hint_cache[question_id] = hint
+    return hint
+
+async def cache_hint(question_id: int, hint: str):
+    hint_cache[question_id] = hint
+    await cache.aset(hint_cache_key(question_id), hint, timeout=HINT_SHARED_CACHE_TTL)
+
+# Hint generations currently running, so concurrent requests for the
+# same question wait on one Gemini call instead of starting their own.
+hint_inflight = {}
+
+async def generate_hint(question_id: int) -> str:
+    await recycle_async_db_connections()
+    try:
+        question = await Question.objects.only('id', 'text', 'options').aget(id=question_id)
+    except Question.DoesNotExist:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    # Concurrent hint requests are batched into a single Gemini call
+    ai_hint = await ai_service.hint_batcher.request(question.id, question.text, question.options.get('choices', []))
+
+    # Cache the hint
+    await cache_hint(question_id, ai_hint.strip())
+    return ai_hint.strip()
 
 @app.post("/quiz/generate", response_model=QuizOut)
-def generate_quiz(payload: GenerateQuizIn, user: User = Depends(get_current_user)):
+async def generate_quiz(payload: GenerateQuizIn, user: User = Depends(get_current_user)):
     """
     Generates a new quiz, eventually using AI and adaptive difficulty.
     """
-    
-    user_profile = user.profile
-    performance = user_profile.performance_metrics.get(payload.subject, {"correct": 0, "total": 0})
+    await recycle_async_db_connections()
+    performance = await (
+        SubjectPerformance.objects.filter(user=user, subject=payload.subject)
+        .values('correct', 'total')
+        .afirst()
+    ) or {"correct": 0, "total": 0}
     success_rate = performance['correct'] / performance['total'] if performance['total'] > 0 else 0.5
 
-    quiz = Quiz.objects.create(
+    quiz = await Quiz.objects.acreate(
         title=f'{payload.subject} Quiz for Grade {payload.grade}',
         grade=payload.grade,
         subject=payload.subject,
         max_score=payload.max_score, 
     )
 
-    prompt = (
-        f'You are a quiz generation AI. Generate {payload.total_questions} multiple-choice questions for a quiz on the subject of "{payload.subject}" for a grade {payload.grade} student. '
-        f'The student has a historical success rate of {success_rate:.0%} in this subject, so adjust the difficulty mix accordingly (e.g., more easy questions for low success rate). '
-        'Provide your response as a single valid JSON object. Do not include any text, code block formatting, or explanations before or after the JSON object. '
-        'The JSON object must contain a single key "questions" which is a list of question objects. '
-        'Each question object must have exactly these keys: "text" (string), "options" (a list of 4 strings), "correct_answer" (a string that is one of the options), and "difficulty" (a string: "easy", "medium", or "hard").'
-        'Crucially, each option in the "options" list must be a string prefixed with "A. ", "B. ", "C. ", or "D. ". '
-        'The "correct_answer" key must contain ONLY the capital letter of the correct option (e.g., "A", "B", "C", or "D").'
-    )
+    # Split large quizzes into smaller prompts that Gemini can answer in parallel
+    counts = [
+        min(QUESTIONS_PER_PROMPT, payload.total_questions - start)
+        for start in range(0, payload.total_questions, QUESTIONS_PER_PROMPT)
+    ]
+
+    def build_prompt(part: int, count: int) -> str:
+        # Each part is generated separately, so give it its own share of the subject
+        # to stop the parts from coming back with the same questions
+        scope = (
+            f'This is part {part} of {len(counts)} of the quiz. Divide the subject into {len(counts)} distinct topic areas '
+            f'and only ask about area {part}, so this part does not overlap with the others. '
+            if len(counts) > 1 else ''
+        )
+        return (
+            f'You are a quiz generation AI. Generate {count} multiple-choice questions for a quiz on the subject of "{payload.subject}" for a grade {payload.grade} student. '
+            f'{scope}'
+            f'The student has a historical success rate of {success_rate:.0%} in this subject, so adjust the difficulty mix accordingly (e.g., more easy questions for low success rate). '
+            'Provide your response as a single valid JSON object. Do not include any text, code block formatting, or explanations before or after the JSON object. '
+            'The JSON object must contain a single key "questions" which is a list of question objects. '
+            'Each question object must have exactly these keys: "text" (string), "options" (a list of 4 strings), "correct_answer" (a string that is one of the options), and "difficulty" (a string: "easy", "medium", or "hard").'
+            'Crucially, each option in the "options" list must be a string prefixed with "A. ", "B. ", "C. ", or "D. ". '
+            'The "correct_answer" key must contain ONLY the capital letter of the correct option (e.g., "A", "B", "C", or "D").'
+        )
+
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_PROMPTS)
+
+    async def generate_part(part: int, count: int) -> dict:
+        async with semaphore:
+            return await ai_service.generate_json_response(build_prompt(part, count))
 
     try:
-        ai_response = ai_service.generate_json_response(prompt)
-        questions_data = ai_response.get("questions", [])
+        results = await asyncio.gather(
+            *[generate_part(part, count) for part, count in enumerate(counts, start=1)],
+            return_exceptions=True,
+        )
+        # A failed part only shortens the quiz; give up if none of them worked
+        ai_responses = [result for result in results if isinstance(result, dict)]
+        if len(ai_responses) < len(results):
+            logging.warning(f"{len(results) - len(ai_responses)} of {len(results)} quiz generation prompts failed")
+        if not ai_responses:
+            raise ValueError("All AI generation requests failed.")
+        questions_data = [q for ai_response in ai_responses for q in ai_response.get("questions", [])]
 
         questions_to_create = []
+        seen_texts = set()
         for q_data in questions_data:
             # Basic validation
             if not all(key in q_data for key in ["text", "options", "correct_answer", "difficulty"]):
                 continue # Skip malformed question data
+            # Drop questions another part already asked
+            text_key = " ".join(str(q_data["text"]).lower().split())
+            if text_key in seen_texts:
+                continue
+            seen_texts.add(text_key)
 
             q = Question(
                 quiz=quiz,
                 text=q_data["text"],
                 options={"choices": q_data["options"]},
-                correct_answer=q_data["correct_answer"],
+                correct_answer=Question.normalize_answer(q_data["correct_answer"]),
                 difficulty=q_data["difficulty"]
             )
             questions_to_create.append(q)
@@ -352,10 +537,17 @@ def generate_quiz(payload: GenerateQuizIn, user: User = Depends(get_current_user
         if not questions_to_create:
             raise ValueError("AI returned no valid questions.")
         
-        Question.objects.bulk_create(questions_to_create)
+        # The AI calls may have taken long enough for the connection to go stale
+        await recycle_async_db_connections()
+        await Question.objects.abulk_create(questions_to_create, batch_size=QUESTION_BATCH_SIZE)
+        if questions_to_create[0].pk is None:
+            # This backend can't return ids from a bulk INSERT, so read them back
+            questions_to_create = [
+                q async for q in quiz.questions.only('id', 'text', 'options', 'difficulty').order_by('id')
+            ]
 
     except (HTTPException, ValueError) as e:
-        quiz.delete()
+        await quiz.adelete()
         print(f"AI generation failed, falling back. Error: {e}")
         raise HTTPException(status_code=500, detail="AI service failed to generate the quiz.")
     
@@ -364,21 +556,114 @@ def generate_quiz(payload: GenerateQuizIn, user: User = Depends(get_current_user
         title=quiz.title,
         subject=quiz.subject,
         grade=quiz.grade,
-        questions=[QuestionOut(**q.__dict__) for q in quiz.questions.all()]
+        # bulk_create has filled in the primary keys (or they were read back above)
+        questions=[QuestionOut.model_validate(q) for q in questions_to_create]
+    )
+
+NO_SUGGESTIONS = ["No specific suggestions at this time."]
+# Suggestions still missing this long after they were requested are treated as lost
+# (e.g. the worker restarted before the background task ran) and requested again
+SUGGESTIONS_TIMEOUT = datetime.timedelta(minutes=5)
+
+def split_suggestions(text: str) -> List[str]:
+    """
+    Splits the AI's bulleted tips ("* tip one\n* tip two") into separate items.
+    Lines that don't start a new bullet are kept with the tip before them.
+    """
+    tips = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not tips or stripped.startswith(("* ", "*\t")):
+            tips.append(stripped)
+        elif stripped:
+            tips[-1] += "\n" + stripped
+    return [tip.strip(" *\n") for tip in tips if tip.strip(" *\n")]
+
+def save_submission(quiz: Quiz, user: User, correct_count: int, total_questions: int, **fields) -> Submission:
+    """
+    Saves the submission and adds its result to the user's subject performance
+    in one transaction.
+    """
+    with transaction.atomic():
+        submission = Submission.objects.create(quiz=quiz, user=user, **fields)
+        if quiz.subject:
+            record_performance(user, quiz.subject, correct_count, total_questions)
+        return submission
+
+def record_performance(user: User, subject: str, correct: int, total: int):
+    # Increment in the database so concurrent submissions don't lose updates
+    performance = SubjectPerformance.objects.filter(user=user, subject=subject)
+    if performance.update(correct=F('correct') + correct, total=F('total') + total):
+        return
+    try:
+        with transaction.atomic():
+            SubjectPerformance.objects.create(user=user, subject=subject, correct=correct, total=total)
+    except IntegrityError:
+        # Another submission created the row first
+        performance.update(correct=F('correct') + correct, total=F('total') + total)
+
+def claim_stale_suggestions(submission_id: int) -> bool:
+    """
+    Marks the submission's suggestions as requested again if they are still
+    missing after SUGGESTIONS_TIMEOUT. Returns True if this caller should
+    regenerate them; a single UPDATE, so concurrent callers can't both claim it.
+    """
+    now = timezone.now()
+    stale = Q(suggestions_requested_at__isnull=True) | Q(suggestions_requested_at__lt=now - SUGGESTIONS_TIMEOUT)
+    return bool(
+        Submission.objects.filter(stale, id=submission_id, suggestions__isnull=True)
+        .update(suggestions_requested_at=now)
     )
 
+async def generate_suggestions(submission_id: int, subject: str, wrong_questions: List[str]):
+    """
+    Background task: asks the AI for improvement tips and stores them on the submission.
+    """
+    missed = "\n- ".join(wrong_questions)
+    prompt = (
+        f"You are an encouraging tutor. A student missed the following questions in a '{subject}' quiz. "
+        f"Based on these mistakes, provide exactly two distinct, actionable tips for improvement. "
+        f"Keep the tips concise and encouraging. Start each tip with a bullet point. "
+        f"Do not explain the answers, focus on the underlying concepts.\n"
+        f"Missed Questions:\n- {missed}"
+    )
+    try:
+        suggestions_text = await ai_service.generate_text_response(prompt)
+        ai_suggestions = split_suggestions(suggestions_text)
+    except HTTPException as e:
+        logging.error(f"AI suggestions failed for submission {submission_id}: {e.detail}")
+        ai_suggestions = NO_SUGGESTIONS
+
+    # The AI call may have taken long enough for the connection to go stale
+    await recycle_async_db_connections()
+    await Submission.objects.filter(id=submission_id).aupdate(suggestions=ai_suggestions)
+
 @app.post("/quiz/submit")
-def submit_quiz(payload: QuizSubmitRequest, user: User = Depends(get_current_user)):
+async def submit_quiz(payload: QuizSubmitRequest, background_tasks: BackgroundTasks, user: User = Depends(get_current_user)):
     """
     Submits quiz answers, evaluates them, and provides AI-powered suggestions.
+    Suggestions are generated after the response is sent and can be read
+    from the submission details once ready.
     """
+    await recycle_async_db_connections()
     try:
-        quiz = Quiz.objects.prefetch_related('questions').get(id=payload.quizId)
+        quiz = await (
+            Quiz.objects.only('id', 'title', 'subject', 'max_score')
+            .annotate(question_count=Count('questions'))
+            .aget(id=payload.quizId)
+        )
     except Quiz.DoesNotExist:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    questions = {q.id: q for q in quiz.questions.all()}
-    total_questions = len(questions)
+    # only load the questions that were actually answered, and only the columns scoring needs
+    answered = await (
+        Question.objects.filter(quiz_id=quiz.id)
+        .only('id', 'text', 'correct_answer')
+        .ain_bulk([r.questionId for r in payload.responses])
+    )
+    # question id -> (text, correct answer); answers are stored normalized
+    questions = {q_id: (q.text, q.correct_answer) for q_id, q in answered.items()}
+    total_questions = quiz.question_count
     
     # --- Scoring Logic ---
     if total_questions == 0:
@@ -390,63 +675,46 @@ def submit_quiz(payload: QuizSubmitRequest, user: User = Depends(get_current_use
     calculated_score = 0
     detailed_results = []
     user_answers = {}
-    detailed_breakdown = []
+    wrong_questions = []
 
     for resp in payload.responses:
-        question = questions.get(resp.questionId)
-        if not question:
+        entry = questions.get(resp.questionId)
+        if entry is None:
             continue
+        question_text, correct_answer = entry
 
-        is_correct = resp.userResponse.strip().upper() == question.correct_answer.strip().upper()
+        is_correct = Question.normalize_answer(resp.userResponse) == correct_answer
         if is_correct:
             correct_count += 1
             calculated_score += points_per_question 
+        else:
+            wrong_questions.append(question_text)
         
-        detailed_breakdown.append({
-            "question_text": question.text,
-            "is_correct": is_correct,
-            "user_answer": resp.userResponse.upper(),
-            "correct_answer": question.correct_answer
-        })
         # For storing in database
         detailed_results.append({
-            "question_id": question.id,
+            "question_id": resp.questionId,
             "is_correct": is_correct,
             "user_answer": resp.userResponse,
-            "correct_answer": question.correct_answer
+            "correct_answer": correct_answer
         })
-        user_answers[str(question.id)] = resp.userResponse
-    
-    submission = Submission.objects.create(
+        user_answers[str(resp.questionId)] = resp.userResponse
+
+    submission = await sync_to_async(save_submission)(
         quiz=quiz,
         user=user,
+        correct_count=correct_count,
+        total_questions=total_questions,
         answers=user_answers,
         results=detailed_results,
         score=round(calculated_score), 
         max_score=quiz.max_score, 
+        suggestions=None if wrong_questions else NO_SUGGESTIONS,
+        suggestions_requested_at=timezone.now() if wrong_questions else None,
     )
 
-    wrong_questions = []
-    for result in detailed_results:
-        if not result["is_correct"]:
-            # find full question text from the questions map
-            question_text = questions.get(result['question_id']).text
-            wrong_questions.append(question_text)
-
-    ai_suggestions = ["No specific suggestions at this time."]
+    # Don't keep the client waiting on the AI, the tips are stored on the submission when ready
     if wrong_questions:
-        missed = "\n- ".join(wrong_questions)
-        prompt = (
-            f"You are an encouraging tutor. A student missed the following questions in a '{quiz.subject}' quiz. "
-            f"Based on these mistakes, provide exactly two distinct, actionable tips for improvement. "
-            f"Keep the tips concise and encouraging. Start each tip with a bullet point. "
-            f"Do not explain the answers, focus on the underlying concepts.\n"
-            f"Missed Questions:\n- {missed}"
-        )
-        suggestions_text = ai_service.generate_text_response(prompt)
-        ai_suggestions = [
-            t.strip(" *\n") for t in re.split(r"\n\s*\*\s+", suggestions_text) if t.strip()
-        ]
+        background_tasks.add_task(generate_suggestions, submission.id, quiz.subject, wrong_questions)
 
     return {
         "submissionId": submission.id,
@@ -455,20 +723,32 @@ def submit_quiz(payload: QuizSubmitRequest, user: User = Depends(get_current_use
         "correctQuestions": correct_count,
         "totalQuestions": total_questions,
         "submittedAt": submission.submitted_at,
-        "suggestions": ai_suggestions,
-        "detailed_breakdown": detailed_breakdown
+        "suggestions": submission.suggestions,
+        "detailed_breakdown": [
+            {
+                "question_text": questions[result["question_id"]][0],
+                "is_correct": result["is_correct"],
+                "user_answer": result["user_answer"].upper(),
+                "correct_answer": result["correct_answer"]
+            }
+            for result in detailed_results
+        ]
     }
 
 @app.get("/quiz/history", response_model=List[SubmissionOut])
+@recycles_db_connections
 def get_quiz_history(
     user: User = Depends(get_current_user),
     subject: Optional[str] = Query(None),
     grade: Optional[int] = Query(None),
     from_date: Optional[datetime.date] = Query(None, alias="from"),
-    to_date: Optional[datetime.date] = Query(None, alias="to")
+    to_date: Optional[datetime.date] = Query(None, alias="to"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0)
 ):
     """
     Retrieves quiz history for the current user with powerful filtering.
+    Results are newest first and paginated with `limit`/`offset`.
     """
     filters = Q(user=user)
     if subject:
@@ -480,31 +760,36 @@ def get_quiz_history(
     if to_date:
         filters &= Q(submitted_at__date__lte=to_date)
     
-    submissions = Submission.objects.filter(filters).select_related('quiz').order_by('-submitted_at')
+    # Read plain rows with just the SubmissionOut columns, one page at a time
+    submissions = (
+        Submission.objects.filter(filters)
+        .order_by('-submitted_at')
+        .values('id', 'score', 'max_score', 'submitted_at', 'is_retry', quiz_title=F('quiz__title'))
+        [offset:offset + limit]
+    )
     
-    return [
-        SubmissionOut(
-            id=s.id,
-            quiz_title=s.quiz.title,
-            score=s.score,
-            max_score=s.max_score,
-            submitted_at=s.submitted_at,
-            is_retry=s.is_retry
-        ) for s in submissions
-    ]
+    return [SubmissionOut(**row) for row in submissions]
 
 @app.get("/quiz/history/{submission_id}", response_model=SubmissionReviewOut)
-def get_submission_details(submission_id: int, user: User = Depends(get_current_user)):
+@recycles_db_connections
+def get_submission_details(submission_id: int, background_tasks: BackgroundTasks, user: User = Depends(get_current_user)):
     """
     Retrieves the detailed results of a specific, single quiz submission
     for the currently authenticated user.
     """
     try:
-        submission = Submission.objects.select_related('quiz').get(id=submission_id, user=user)
+        submission = (
+            Submission.objects.select_related('quiz')
+            .only(
+                'id', 'score', 'max_score', 'submitted_at', 'results',
+                'suggestions', 'suggestions_requested_at', 'quiz__title', 'quiz__subject'
+            )
+            .get(id=submission_id, user=user)
+        )
     except Submission.DoesNotExist:
         raise HTTPException(status_code=404, detail="Submission not found or you do not have permission to view it.")
 
-    question_texts = {q.id: q.text for q in submission.quiz.questions.all()}
+    question_texts = dict(Question.objects.filter(quiz_id=submission.quiz_id).values_list('id', 'text'))
 
     question_reviews = []
     for result_item in submission.results:
@@ -518,16 +803,27 @@ def get_submission_details(submission_id: int, user: User = Depends(get_current_
             )
         )
 
+    suggestions = submission.suggestions
+    if suggestions is None:
+        wrong_questions = [review.question_text for review in question_reviews if not review.is_correct]
+        if not wrong_questions:
+            suggestions = NO_SUGGESTIONS
+        elif claim_stale_suggestions(submission.id):
+            # The original background task never stored anything, run it again
+            background_tasks.add_task(generate_suggestions, submission.id, submission.quiz.subject, wrong_questions)
+
     return SubmissionReviewOut(
         submission_id=submission.id,
         quiz_title=submission.quiz.title,
         score=submission.score,
         max_score=submission.max_score,
         submitted_at=submission.submitted_at,
+        suggestions=suggestions,
         questions=question_reviews
     )
 
 @app.post("/quiz/retry/{submission_id}", response_model=QuizOut)
+@recycles_db_connections
 def retry_quiz(submission_id: int, user: User = Depends(get_current_user)):
     """
     Allows a user to retry a previously taken quiz.
@@ -535,7 +831,15 @@ def retry_quiz(submission_id: int, user: User = Depends(get_current_user)):
     """
     try:
         # Ensure the user is retrying their own submission
-        submission = Submission.objects.select_related('quiz').get(id=submission_id, user=user)
+        submission = Submission.objects.select_related('quiz').only(
+            'id', 'quiz__title', 'quiz__subject', 'quiz__grade'
+        ).prefetch_related(
+            Prefetch(
+                'quiz__questions',
+                queryset=Question.objects.only('id', 'quiz_id', 'text', 'options', 'difficulty').order_by('id'),
+                to_attr='cached_questions',
+            )
+        ).get(id=submission_id, user=user)
     except Submission.DoesNotExist:
         raise HTTPException(status_code=404, detail="Submission not found or you do not have permission to retry it.")
 
@@ -547,37 +851,99 @@ def retry_quiz(submission_id: int, user: User = Depends(get_current_user)):
         title=quiz.title,
         subject=quiz.subject,
         grade=quiz.grade,
-        questions=[QuestionOut(**q.__dict__) for q in quiz.questions.all()]
+        questions=[QuestionOut.model_validate(q) for q in quiz.cached_questions]
     )
 
 @app.post("/quiz/hint")
-def get_hint(payload: HintRequest, user: User = Depends(get_current_user)):
+async def get_hint(payload: HintRequest, user: User = Depends(get_current_user)):
     """
     Provides an AI-generated hint for a specific question.
     """
     # Caching logic
-    if payload.questionId in hint_cache:
-        return {"questionId": payload.questionId, "hint": hint_cache[payload.questionId]}
-    
-    try:
-        question = Question.objects.get(id=payload.questionId)
-    except Question.DoesNotExist:
-        raise HTTPException(status_code=404, detail="Question not found")
-    
-    prompt = (
-        f"You are a helpful quiz assistant. Provide a short, one-sentence hint for the following multiple-choice question. "
-        f"The hint must guide the user toward the correct thinking process without revealing the answer. "
-        f"Question: \"{question.text}\" Options: {question.options.get('choices', [])}"
-    )
-
-    ai_hint = ai_service.generate_text_response(prompt)
+    cached_hint = await get_cached_hint(payload.questionId)
+    if cached_hint is not None:
+        return {"questionId": payload.questionId, "hint": cached_hint}
+
+    task = hint_inflight.get(payload.questionId)
+    if task is None:
+        task = asyncio.create_task(generate_hint(payload.questionId))
+        hint_inflight[payload.questionId] = task
+        task.add_done_callback(lambda _: hint_inflight.pop(payload.questionId, None))
+
+    # shield so one client disconnecting doesn't cancel the others' hint
+    hint = await asyncio.shield(task)
+    return {"questionId": payload.questionId, "hint": hint}
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    lines = [f"event: {event}"] if event else []
+    lines += [f"data: {line}" for line in data.split("\n")]
+    return "\n".join(lines) + "\n\n"
+
+@app.post("/quiz/hint/stream")
+async def stream_hint(payload: HintRequest, user: User = Depends(get_current_user)):
+    """
+    Same as /quiz/hint, but streams the hint as server-sent events while the AI generates it.
+    """
+    cached_hint = await get_cached_hint(payload.questionId)
+
+    if cached_hint is None:
+        await recycle_async_db_connections()
+        try:
+            question = await Question.objects.only('id', 'text', 'options').aget(id=payload.questionId)
+        except Question.DoesNotExist:
+            raise HTTPException(status_code=404, detail="Question not found")
+
+        prompt = ai_service.hint_prompt(question.text, question.options.get('choices', []))
+
+    async def event_stream():
+        if cached_hint is not None:
+            yield sse_event(cached_hint)
+            yield sse_event("", event="done")
+            return
+
+        chunks = []
+        try:
+            async for chunk in ai_service.stream_text_response(prompt):
+                chunks.append(chunk)
+                yield sse_event(chunk)
+        except HTTPException as e:
+            yield sse_event(e.detail, event="error")
+            return
+
+        # Cache the full hint once the stream completes, unless nothing usable came back
+        hint = "".join(chunks).strip()
+        if not hint:
+            yield sse_event("AI service failed to generate a hint.", event="error")
+            return
+        await cache_hint(payload.questionId, hint)
+        yield sse_event("", event="done")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+def leaderboard_rows(subject: Optional[str], grade: Optional[int]) -> List[tuple]:
+    """
+    Returns the top 10 (username, top_score) pairs, best first.
+    """
+    if leaderboard.is_available():
+        return leaderboard.top_scores(subject, grade)
 
-    # Cache the hint
-    hint_cache[payload.questionId] = ai_hint.strip()
+    filters = Q()
+    if subject:
+        filters &= Q(quiz__subject__iexact=subject)
+    if grade:
+        filters &= Q(quiz__grade=grade)
 
-    return {"questionId": question.id, "hint": ai_hint.strip()}
+    # GROUP BY, MAX, ORDER BY and LIMIT all run in the database
+    leaderboard_data = (
+        Submission.objects.filter(filters)
+        .values('user_id', 'user__username')
+        .annotate(top_score=Max('score'))
+        .order_by('-top_score')[:10]
+    )
+    return [(entry['user__username'], entry['top_score']) for entry in leaderboard_data]
 
 @app.get("/leaderboard", response_model=List[LeaderboardEntry])
+@recycles_db_connections
 def get_leaderboard(
     subject: Optional[str] = Query(None),
     grade: Optional[int] = Query(None)
@@ -586,18 +952,15 @@ def get_leaderboard(
     Retrieves the top 10 user scores for a given subject and/or grade.
     If no filters are provided, it returns the overall top 10 scores.
     """
-    submissions = Submission.objects.all()
-
-    if subject:
-        submissions = submissions.filter(quiz__subject__iexact=subject)
-    if grade:
-        submissions = submissions.filter(quiz__grade=grade)
-
-    leaderboard_data = submissions.values('user__username').annotate(top_score=Max('score')).order_by('-top_score')[:10]
-
-    response = [
-        LeaderboardEntry(rank=i + 1, username=entry['user__username'], top_score=entry['top_score'])
-        for i, entry in enumerate(leaderboard_data)
-    ]
+    # Subjects match case-insensitively, so they share a cache entry
+    subject_key = hashlib.md5((subject or "").upper().encode()).hexdigest()
+    rows = cache.get_or_set(
+        f"leaderboard:{subject_key}:{grade or 0}",
+        lambda: leaderboard_rows(subject, grade),
+        timeout=LEADERBOARD_REFRESH_SECONDS,
+    )
 
-    return response
\ No newline at end of file
+    return [
+        LeaderboardEntry(rank=i + 1, username=username, top_score=top_score)
+        for i, (username, top_score) in enumerate(rows)
+    ]
\ No newline at end of file
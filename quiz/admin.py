@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import UserProfile, Quiz, Question, Submission
+from .models import UserProfile, SubjectPerformance, Quiz, Question, Submission
 # Register your models here.
 
 admin.site.register(UserProfile)
+admin.site.register(SubjectPerformance)
 admin.site.register(Quiz)
 admin.site.register(Question)
 admin.site.register(Submission)
-
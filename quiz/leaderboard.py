@@ -0,0 +1,50 @@
+from django.db import connection
+
+# Materialized view with each user's best score per subject and grade.
+# It only exists on PostgreSQL (see migration 0005); other databases
+# compute the leaderboard directly from Submission.
+VIEW_NAME = "quiz_leaderboard"
+# Key for the advisory lock that stops several workers refreshing at once
+REFRESH_LOCK_KEY = 7_310_001
+
+def is_available() -> bool:
+    return connection.vendor == "postgresql"
+
+def refresh():
+    """
+    Refreshes the leaderboard view without blocking readers.
+    Skips the refresh if another process is already running one.
+    """
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [REFRESH_LOCK_KEY])
+        if not cursor.fetchone()[0]:
+            return
+        try:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {VIEW_NAME}")
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [REFRESH_LOCK_KEY])
+
+def top_scores(subject=None, grade=None, limit=10):
+    """
+    Returns (username, top_score) rows from the view, best first.
+    Subject matching is case-insensitive, like `iexact`.
+    """
+    conditions = []
+    params = []
+    if subject:
+        conditions.append("subject_key = UPPER(%s)")
+        params.append(subject)
+    if grade:
+        conditions.append("grade = %s")
+        params.append(grade)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT username, MAX(top_score) AS top_score FROM {VIEW_NAME} {where} "
+            "GROUP BY user_id, username ORDER BY top_score DESC LIMIT %s",
+            params + [limit],
+        )
+        return cursor.fetchall()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quiz import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Refreshes the leaderboard materialized view (PostgreSQL only)."
+
+    def handle(self, *args, **options):
+        if not leaderboard.is_available():
+            self.stdout.write("Leaderboard view is only used on PostgreSQL, nothing to refresh.")
+            return
+        leaderboard.refresh()
+        self.stdout.write(self.style.SUCCESS("Leaderboard refreshed."))
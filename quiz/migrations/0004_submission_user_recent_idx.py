@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-15 00:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz", "0003_remove_quiz_difficulty_question_difficulty_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(
+                fields=["user", "-submitted_at"], name="submission_user_recent_idx"
+            ),
+        ),
+    ]
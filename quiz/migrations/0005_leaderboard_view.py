@@ -0,0 +1,42 @@
+from django.db import migrations
+
+CREATE_STATEMENTS = [
+    """
+    CREATE MATERIALIZED VIEW quiz_leaderboard AS
+    SELECT s.user_id,
+           u.username,
+           COALESCE(UPPER(q.subject), '') AS subject_key,
+           COALESCE(q.grade, 0) AS grade,
+           MAX(s.score) AS top_score
+    FROM quiz_submission s
+    JOIN quiz_quiz q ON q.id = s.quiz_id
+    JOIN auth_user u ON u.id = s.user_id
+    GROUP BY s.user_id, u.username, COALESCE(UPPER(q.subject), ''), COALESCE(q.grade, 0)
+    """,
+    # REFRESH ... CONCURRENTLY requires a unique index
+    "CREATE UNIQUE INDEX quiz_leaderboard_key ON quiz_leaderboard (user_id, subject_key, grade)",
+    "CREATE INDEX quiz_leaderboard_rank ON quiz_leaderboard (subject_key, grade, top_score DESC)",
+]
+
+
+def create_leaderboard_view(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def drop_leaderboard_view(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP MATERIALIZED VIEW IF EXISTS quiz_leaderboard")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz", "0004_submission_user_recent_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_leaderboard_view, drop_leaderboard_view),
+    ]
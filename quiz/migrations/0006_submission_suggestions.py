@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-15 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz", "0005_leaderboard_view"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="submission",
+            name="suggestions",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
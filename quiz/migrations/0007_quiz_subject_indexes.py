@@ -0,0 +1,47 @@
+# Generated by Django 4.2.24 on 2026-10-15 00:36
+
+import logging
+
+from django.db import DatabaseError, migrations, models, transaction
+import django.db.models.functions.text
+
+
+def create_subject_trigram_index(apps, schema_editor):
+    # icontains on PostgreSQL is UPPER(subject) LIKE UPPER('%...%'), which
+    # only a trigram index on the same expression can serve.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                "CREATE INDEX quiz_subject_trgm_idx ON quiz_quiz "
+                "USING gin (UPPER(subject::text) gin_trgm_ops)"
+            )
+    except DatabaseError as e:
+        # The index is only an optimization, don't block the deploy on it
+        logging.warning(f"Skipping trigram index on quiz subject: {e}")
+
+
+def drop_subject_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS quiz_subject_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz", "0006_submission_suggestions"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quiz",
+            index=models.Index(
+                django.db.models.functions.text.Upper("subject"),
+                models.F("grade"),
+                name="quiz_subject_upper_idx",
+            ),
+        ),
+        migrations.RunPython(create_subject_trigram_index, drop_subject_trigram_index),
+    ]
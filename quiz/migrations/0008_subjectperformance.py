@@ -0,0 +1,62 @@
+# Generated by Django 4.2.24 on 2026-10-15 00:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_performance_metrics(apps, schema_editor):
+    UserProfile = apps.get_model("quiz", "UserProfile")
+    SubjectPerformance = apps.get_model("quiz", "SubjectPerformance")
+    SubjectPerformance.objects.bulk_create(
+        SubjectPerformance(
+            user_id=profile.user_id,
+            subject=subject,
+            correct=metrics.get("correct", 0),
+            total=metrics.get("total", 0),
+        )
+        for profile in UserProfile.objects.exclude(performance_metrics={})
+        for subject, metrics in profile.performance_metrics.items()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("quiz", "0007_quiz_subject_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubjectPerformance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=100)),
+                ("correct", models.IntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subject_performance",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="subjectperformance",
+            constraint=models.UniqueConstraint(
+                fields=("user", "subject"), name="subject_performance_user_subject_uniq"
+            ),
+        ),
+        migrations.RunPython(copy_performance_metrics, migrations.RunPython.noop),
+    ]
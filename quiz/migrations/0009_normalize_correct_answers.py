@@ -0,0 +1,22 @@
+# Generated by Django 4.2.24 on 2026-10-15 00:47
+
+from django.db import migrations
+from django.db.models.functions import Trim, Upper
+
+
+def normalize_correct_answers(apps, schema_editor):
+    Question = apps.get_model("quiz", "Question")
+    normalized = Upper(Trim("correct_answer"))
+    Question.objects.exclude(correct_answer=normalized).update(
+        correct_answer=normalized
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz", "0008_subjectperformance"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_correct_answers, migrations.RunPython.noop),
+    ]
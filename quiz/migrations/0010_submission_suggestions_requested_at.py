@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-15 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz", "0009_normalize_correct_answers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="submission",
+            name="suggestions_requested_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,13 +1,29 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 # Create your models here.
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
-    # This field will store aggregated performance data for the adaptive AI
+    # Legacy per-subject performance blob, superseded by SubjectPerformance (copied over in migration 0008)
     # Example: {"math": {"correct": 30, "total": 50}, "science": {"correct": 25, "total": 40}}
     performance_metrics = models.JSONField(default=dict)
     def __str__(self):
         return self.user.username
+
+class SubjectPerformance(models.Model):
+    # Running answer counts per user and subject, used for adaptive difficulty
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="subject_performance")
+    subject = models.CharField(max_length=100)
+    correct = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "subject"], name="subject_performance_user_subject_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.subject}: {self.correct}/{self.total}"
     
 class Quiz(models.Model):
     title = models.CharField(max_length=255)
@@ -15,6 +31,14 @@ class Quiz(models.Model):
     grade = models.IntegerField(default=1, null=True, blank=True)
     max_score = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Subject filters are case-insensitive, so index UPPER(subject)
+            # rather than the raw column (see also the trigram index in 0007).
+            models.Index(Upper("subject"), "grade", name="quiz_subject_upper_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -27,8 +51,19 @@ class Question(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="questions")
     text = models.TextField()
     options = models.JSONField(default=dict)   
+    # Stored normalized (trimmed, upper-case option letter) so scoring can compare directly
     correct_answer = models.CharField(max_length=255)
     difficulty = models.CharField(max_length=50, choices=DIFFICULTY_CHOICES, default="medium")
+
+    @staticmethod
+    def normalize_answer(answer):
+        return (answer or "").strip().upper()
+
+    def save(self, *args, **kwargs):
+        # bulk_create skips this, so callers creating questions in bulk normalize themselves
+        self.correct_answer = self.normalize_answer(self.correct_answer)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"({self.difficulty}) {self.text[:50]}..."
     
@@ -41,5 +76,15 @@ class Submission(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
     is_retry = models.BooleanField(default=False)
     max_score = models.IntegerField(default=0)
+    # AI improvement tips, filled in after submission (null while being generated)
+    suggestions = models.JSONField(null=True, blank=True)
+    # When the tips were last requested, so a job lost to a worker restart can be retried
+    suggestions_requested_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-submitted_at"], name="submission_user_recent_idx"),
+        ]
+
     def __str__(self):
         return f"Submission by {self.user.username} for {self.quiz.title}"
\ No newline at end of file
@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Question
+
+def hint_cache_key(question_id):
+    return f"hint:{question_id}"
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def forget_hint(sender, instance, created=False, **kwargs):
+    """
+    Drops a question's cached hint when it is edited or deleted, so the API
+    regenerates it from the current text.
+
+    This only reaches other processes (e.g. the API when the edit happens in the
+    admin or a shell) if the cache is shared, i.e. REDIS_URL is set. With the
+    default per-process cache, the API's copy lives until its timeout.
+    """
+    if not created:
+        cache.delete(hint_cache_key(instance.pk))
@@ -1,3 +1,191 @@
-from django.test import TestCase
+import asyncio
+import time
+from unittest import mock
+
+import jwt
+from cachetools import TLRUCache
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from api import ai_service, auth_cache, main
+from api.main import HintRequest, split_suggestions
+from quiz.models import Question, Quiz
+from quiz.signals import hint_cache_key
 
 # Create your tests here.
+
+class HintBatcherTests(SimpleTestCase):
+    async def request_hints(self, batch_reply):
+        """
+        Sends hint requests for questions 1 and 2 through one batch, with the
+        batch call answering `batch_reply` (or raising it, if it's an exception)
+        and single-question calls answering "single hint".
+        """
+        batcher = ai_service.HintBatcher(window=0.01)
+        single_prompts = []
+
+        async def fake_json(prompt):
+            if isinstance(batch_reply, Exception):
+                raise batch_reply
+            return batch_reply
+
+        async def fake_text(prompt):
+            single_prompts.append(prompt)
+            return " single hint \n"
+
+        with mock.patch.object(ai_service, "generate_json_response", fake_json), \
+                mock.patch.object(ai_service, "generate_text_response", fake_text):
+            hints = await asyncio.gather(
+                batcher.request(1, "What is 2 + 2?", ["A. 3", "B. 4"]),
+                batcher.request(2, "What is 3 + 3?", ["A. 6", "B. 7"]),
+            )
+        await batcher.stop()
+        return hints, single_prompts
+
+    async def test_matches_string_ids(self):
+        hints, single_prompts = await self.request_hints(
+            {"hints": [{"id": "2", "hint": "Double three."}, {"id": "1", "hint": " Double two. "}]}
+        )
+        self.assertEqual(hints, ["Double two.", "Double three."])
+        self.assertEqual(single_prompts, [])
+
+    async def test_partial_reply_falls_back_to_single_question(self):
+        hints, single_prompts = await self.request_hints(
+            {"hints": [{"id": 1, "hint": "Double two."}, {"id": "two", "hint": "Bad id."}]}
+        )
+        self.assertEqual(hints, ["Double two.", "single hint"])
+        self.assertEqual(len(single_prompts), 1)
+        self.assertIn("What is 3 + 3?", single_prompts[0])
+
+    async def test_malformed_reply_falls_back_for_every_question(self):
+        hints, single_prompts = await self.request_hints({"hints": "none"})
+        self.assertEqual(hints, ["single hint", "single hint"])
+        self.assertEqual(len(single_prompts), 2)
+
+    async def test_failed_batch_call_falls_back_for_every_question(self):
+        error = ai_service.HTTPException(status_code=503, detail="AI service failed to generate a valid JSON response.")
+        hints, single_prompts = await self.request_hints(error)
+        self.assertEqual(hints, ["single hint", "single hint"])
+        self.assertEqual(len(single_prompts), 2)
+
+    async def test_stop_cancels_the_worker(self):
+        batcher = ai_service.HintBatcher(window=0.01)
+
+        async def fake_json(prompt):
+            return {"hints": [{"id": 1, "hint": "Double two."}]}
+
+        with mock.patch.object(ai_service, "generate_json_response", fake_json):
+            await batcher.request(1, "What is 2 + 2?", ["A. 3", "B. 4"])
+            worker = batcher._worker
+            await batcher.stop()
+            self.assertTrue(worker.cancelled())
+            # A new request starts a fresh worker
+            self.assertEqual(await batcher.request(1, "What is 2 + 2?", ["A. 3", "B. 4"]), "Double two.")
+            await batcher.stop()
+
+
+class HintInvalidationTests(TestCase):
+    def setUp(self):
+        quiz = Quiz.objects.create(title="Math Quiz")
+        self.question = Question.objects.create(quiz=quiz, text="What is 2 + 2?", correct_answer="b")
+        cache.set(hint_cache_key(self.question.pk), "Double two.")
+
+    def test_editing_a_question_drops_its_hint(self):
+        self.question.text = "What is 2 + 3?"
+        self.question.save()
+        self.assertIsNone(cache.get(hint_cache_key(self.question.pk)))
+
+    def test_deleting_a_question_drops_its_hint(self):
+        question_id = self.question.pk
+        self.question.delete()
+        self.assertIsNone(cache.get(hint_cache_key(question_id)))
+
+
+class StreamHintTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        main.hint_cache.clear()
+        quiz = Quiz.objects.create(title="Math Quiz")
+        self.question = Question.objects.create(quiz=quiz, text="What is 2 + 2?", correct_answer="b")
+
+    async def stream(self, chunks):
+        async def fake_stream(prompt):
+            for chunk in chunks:
+                yield chunk
+
+        # Closing "old" connections would end the test's transaction
+        with mock.patch.object(main, "close_old_connections", lambda: None), \
+                mock.patch.object(ai_service, "stream_text_response", fake_stream):
+            response = await main.stream_hint(HintRequest(questionId=self.question.pk), user=User(pk=1))
+            return "".join([event async for event in response.body_iterator])
+
+    async def test_caches_streamed_hint(self):
+        body = await self.stream(["Think about ", "doubling."])
+        self.assertTrue(body.endswith("event: done\ndata: \n\n"))
+        self.assertEqual(await main.get_cached_hint(self.question.pk), "Think about doubling.")
+
+    async def test_empty_stream_is_an_error_and_not_cached(self):
+        body = await self.stream([" ", "\n"])
+        self.assertIn("event: error", body)
+        self.assertNotIn("event: done", body)
+        self.assertIsNone(await main.get_cached_hint(self.question.pk))
+
+
+class SplitSuggestionsTests(SimpleTestCase):
+    def test_splits_bulleted_tips(self):
+        text = (
+            "Here are two tips to help you improve:\n"
+            "\n"
+            "  * Review how **fractions** are added.\n"
+            "    Practice with pizza slices or other drawings.\n"
+            "\n"
+            "  *   Learn the times tables up to 10.\n"
+        )
+        self.assertEqual(split_suggestions(text), [
+            "Here are two tips to help you improve:",
+            "Review how **fractions** are added.\nPractice with pizza slices or other drawings.",
+            "Learn the times tables up to 10.",
+        ])
+
+    def test_text_without_bullets_is_one_tip(self):
+        self.assertEqual(split_suggestions("Keep practicing!\n"), ["Keep practicing!"])
+        self.assertEqual(split_suggestions("\n  \n"), [])
+
+
+class GetCurrentUserTests(SimpleTestCase):
+    def test_rejects_token_with_empty_subject(self):
+        token = jwt.encode({"sub": "", "exp": int(time.time()) + 60}, main.SECRET_KEY, algorithm=main.ALGORITHM)
+        with self.assertRaises(HTTPException) as raised:
+            main.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        self.assertEqual(raised.exception.status_code, 401)
+
+
+class AuthCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1_000_000.0
+        fake_cache = TLRUCache(maxsize=10, ttu=auth_cache._expires, timer=lambda: self.now)
+        patcher = mock.patch.object(auth_cache, "_cache", fake_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entry_expires_with_the_token(self):
+        auth_cache.store_user("token", 1, "alice", exp=self.now + 10)
+        self.now += 9.9
+        self.assertEqual(auth_cache.get_user("token"), (1, "alice"))
+        self.now += 0.1
+        self.assertIsNone(auth_cache.get_user("token"))
+
+    def test_entry_expires_after_cache_ttl_for_long_lived_tokens(self):
+        auth_cache.store_user("token", 1, "alice", exp=self.now + 3600)
+        self.now += auth_cache.CACHE_TTL - 0.1
+        self.assertEqual(auth_cache.get_user("token"), (1, "alice"))
+        self.now += 0.1
+        self.assertIsNone(auth_cache.get_user("token"))
+
+    def test_already_expired_token_is_never_returned(self):
+        auth_cache.store_user("token", 1, "alice", exp=self.now - 1)
+        self.assertIsNone(auth_cache.get_user("token"))